@@ -11,6 +11,7 @@ from pathlib import Path
 from openai import OpenAI
 import time
 from typing import Optional
+from download_sfs_documents import YEAR_FOLDER_PATTERN
 
 
 def read_html_file(file_path: str) -> Optional[str]:
@@ -171,9 +172,11 @@ def process_html_files(input_dir: str, output_dir: str, api_key: str, model: str
     # Initialisera OpenAI klient
     client = OpenAI(api_key=api_key)
     
-    # Hitta alla HTML-filer i input-katalogen
-    html_pattern = os.path.join(input_dir, "*.html")
-    html_files = glob.glob(html_pattern)
+    # Hitta alla HTML-filer i input-katalogen, inklusive eventuella årsmappar
+    html_files = glob.glob(os.path.join(input_dir, "*.html")) + [
+        html_file for html_file in glob.glob(os.path.join(input_dir, "*", "*.html"))
+        if YEAR_FOLDER_PATTERN.fullmatch(os.path.basename(os.path.dirname(html_file)))
+    ]
     
     if not html_files:
         print(f"Inga HTML-filer hittades i katalogen: {input_dir}")
@@ -13,14 +13,25 @@ Usage:
     year-based subdirectories.
 """
 
-import json
+import functools
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from pathlib import Path
 from typing import Dict, Any, List, Optional
+import orjson
 from format_sfs_text_to_md import format_sfs_text
 from sort_frontmatter import sort_frontmatter_properties
 from add_pdf_url_to_frontmatter import generate_pdf_url
+from download_sfs_documents import YEAR_FOLDER_PATTERN
+
+try:
+    # C extension from requirements.txt; fall back to the standard library if it cannot be built
+    from ciso8601 import parse_datetime
+except ImportError:
+    parse_datetime = datetime.fromisoformat
 
 
 def format_yaml_value(value: Any) -> str:
@@ -73,15 +84,16 @@ def format_yaml_value(value: Any) -> str:
     return value
 
 
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
 def clean_text(text: Optional[str]) -> str:
     """Clean and format text content."""
     if not text:
         return ""
     
-    # Remove extra whitespace and normalize line breaks
-    text = re.sub(r'\r\n', '\n', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+    # Collapse all whitespace, including line breaks, in a single pass
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
 
 
 def clean_rubrik(rubrik: Optional[str]) -> str:
@@ -101,11 +113,8 @@ def format_datetime(dt_str: Optional[str]) -> Optional[str]:
         return None
     
     try:
-        # Parse the datetime and format it as date only
-        if 'T' in dt_str:
-            dt = datetime.fromisoformat(dt_str.split('T')[0])
-        else:
-            dt = datetime.fromisoformat(dt_str)
+        # Parse the date part only and format it as date
+        dt = parse_datetime(dt_str.split('T')[0])
         return dt.strftime('%Y-%m-%d')
     except (ValueError, AttributeError):
         return dt_str
@@ -227,14 +236,20 @@ departement: {format_yaml_value(organisation)}
 
     return yaml_front_matter + markdown_body
 
+@functools.lru_cache(maxsize=None)
+def ensure_dir(path: Path) -> None:
+    """Create a directory once per process, skipping the syscall on later calls."""
+    path.mkdir(exist_ok=True)
+
+
 def convert_json_to_markdown(json_file_path: Path, output_dir: Path, year_as_folder: bool) -> None:
     """Convert a single JSON file to Markdown format."""
     
     # Read JSON file
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError) as e:
+        with open(json_file_path, 'rb') as f:
+            data = orjson.loads(f.read())
+    except (orjson.JSONDecodeError, FileNotFoundError) as e:
         print(f"Error reading {json_file_path}: {e}")
         return
     
@@ -255,7 +270,7 @@ def convert_json_to_markdown(json_file_path: Path, output_dir: Path, year_as_fol
     if year_as_folder:
         # Create a subdirectory for each document based on year
         document_dir = output_dir / year
-        document_dir.mkdir(exist_ok=True)
+        ensure_dir(document_dir)
     else:
         document_dir = output_dir
 
@@ -271,6 +286,21 @@ def convert_json_to_markdown(json_file_path: Path, output_dir: Path, year_as_fol
         print(f"Error writing {output_file}: {e}")
 
 
+def find_json_files(json_dir: Path) -> List[Path]:
+    """Find JSON files in a directory and its year subdirectories, sorted by path."""
+    json_files = []
+    with os.scandir(json_dir) as entries:
+        for entry in entries:
+            if YEAR_FOLDER_PATTERN.fullmatch(entry.name) and entry.is_dir():
+                # Downloaded documents may be sharded into one subdirectory per year
+                with os.scandir(entry.path) as shard_entries:
+                    json_files.extend(Path(shard_entry.path) for shard_entry in shard_entries
+                                      if shard_entry.name.endswith('.json') and shard_entry.is_file())
+            elif entry.name.endswith('.json') and entry.is_file():
+                json_files.append(Path(entry.path))
+    return sorted(json_files)
+
+
 def main():
     """Main function to process all JSON files in the json directory."""
     
@@ -312,8 +342,8 @@ def main():
         print(f"Error: JSON directory {json_dir} does not exist")
         return
     
-    # Find all JSON files
-    json_files = list(json_dir.glob('*.json'))
+    # Find all JSON files, sorted for a deterministic conversion order
+    json_files = find_json_files(json_dir)
     
     if not json_files:
         print(f"No JSON files found in {json_dir}")
@@ -322,9 +352,10 @@ def main():
     print(f"Found {len(json_files)} JSON file(s) to convert from {json_dir}")
     print(f"Output will be saved to {output_dir}")
     
-    # Convert each JSON file
-    for json_file in json_files:
-        convert_json_to_markdown(json_file, output_dir, args.year_folder)
+    # Convert the JSON files in parallel; parsing and formatting are CPU-bound
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(convert_json_to_markdown, json_files,
+                          repeat(output_dir), repeat(args.year_folder), chunksize=64))
     
     print(f"\nConversion complete! Markdown files saved to {output_dir}")
 
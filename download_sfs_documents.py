@@ -4,12 +4,221 @@ Script för att ladda ner SFS-författningar från Riksdagens öppna data.
 Hämtar först en lista med författnings-ID:n och laddar sedan ner textinnehållet för varje författning.
 """
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import functools
 import os
+import re
 import time
 import argparse
-import json
-from typing import List, Optional, Dict
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, Optional, Dict, Set, Tuple
+
+
+def create_session() -> requests.Session:
+    """
+    Skapar en gemensam HTTP-session med återanvända anslutningar och automatiska omförsök.
+
+    Returns:
+        requests.Session: Konfigurerad session
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # Elasticsearch-sökningen är idempotent även om den skickas som POST
+        allowed_methods=frozenset(['GET', 'POST']),
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=50, max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+
+SESSION = create_session()
+YEAR_FOLDER_PATTERN = re.compile(r'\d{4}')
+
+
+def write_file_atomically(filepath: str, content: bytes) -> None:
+    """
+    Skriver innehåll till en temporär fil och byter sedan atomärt ut målfilen.
+
+    En avbruten körning lämnar därmed aldrig en halvskriven fil som ser ut att vara klar.
+
+    Args:
+        filepath (str): Sökväg till målfilen
+        content (bytes): Innehåll att skriva
+
+    Raises:
+        IOError: Om filen inte kan skrivas
+    """
+    # Unikt namn per tråd så att samtidiga skrivningar till samma fil inte krockar
+    tmp_filepath = f"{filepath}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_filepath, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_filepath, filepath)
+    finally:
+        # Städa bort den temporära filen om skrivningen avbröts, även vid Ctrl-C
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+
+
+@functools.lru_cache(maxsize=None)
+def ensure_dir(path: str) -> None:
+    """
+    Skapar en katalog en gång per körning och hoppar över systemanropet vid senare anrop.
+
+    Args:
+        path (str): Katalog att skapa
+    """
+    os.makedirs(path, exist_ok=True)
+
+
+def get_document_dir(output_dir: str, document_id: str, year_as_folder: bool = True) -> str:
+    """
+    Bestämmer katalogen för en författning. Katalogen skapas först när en fil faktiskt sparas.
+
+    Med årsmappar hamnar t.ex. sfs-2024-1234 i output_dir/2024 så att ingen katalog blir för stor.
+
+    Args:
+        output_dir (str): Baskatalog för nedladdade dokument
+        document_id (str): Författnings-ID, t.ex. "sfs-2024-1234" eller "2024:1234"
+        year_as_folder (bool): Om True, skapa årsmappar
+
+    Returns:
+        str: Katalog att spara filen i
+    """
+    year_match = re.search(r'(\d{4})', document_id)
+    if not year_as_folder or not year_match:
+        return output_dir
+
+    return os.path.join(output_dir, year_match.group(1))
+
+
+def scan_existing_documents(output_dir: str, year_as_folder: bool = True) -> Set[str]:
+    """
+    Listar redan nedladdade filer i output-katalogen och dess årsmappar.
+
+    Genom att läsa katalogerna en gång kan varje kandidat kontrolleras mot en mängd i minnet
+    i stället för med ett filsystemsanrop per dokument. Endast undermappar med fyrsiffriga
+    årtal läses, så att t.ex. --out . inte går igenom .git eller andra kataloger.
+
+    Args:
+        output_dir (str): Baskatalog för nedladdade dokument
+        year_as_folder (bool): Om True, läs även årsmapparna
+
+    Returns:
+        Set[str]: Filnamn för alla nedladdade dokument
+    """
+    existing = set()
+    if not os.path.isdir(output_dir):
+        return existing
+
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                existing.add(entry.name)
+            elif year_as_folder and YEAR_FOLDER_PATTERN.fullmatch(entry.name) and entry.is_dir():
+                with os.scandir(entry.path) as shard_entries:
+                    existing.update(shard_entry.name for shard_entry in shard_entries if shard_entry.is_file())
+    return existing
+
+
+def load_meta(filepath: str) -> Dict[str, str]:
+    """
+    Läser sparade HTTP-metadata (ETag och Last-Modified) för en nedladdad fil.
+
+    Args:
+        filepath (str): Sökväg till den nedladdade filen
+
+    Returns:
+        Dict[str, str]: Metadata, tom om ingen finns eller om den inte kan läsas
+    """
+    try:
+        with open(filepath + ".meta.json", 'rb') as f:
+            meta = orjson.loads(f.read())
+    except (IOError, orjson.JSONDecodeError):
+        return {}
+
+    # En trasig sidofil ska inte stoppa nedladdningen, bara göra anropet ovillkorligt
+    return meta if isinstance(meta, dict) else {}
+
+
+def save_meta(filepath: str, response: requests.Response) -> None:
+    """
+    Sparar ETag och Last-Modified från ett svar bredvid den nedladdade filen.
+
+    Saknar svaret båda värdena tas en tidigare sidofil bort, eftersom den inte längre
+    beskriver innehållet på disk.
+
+    Args:
+        filepath (str): Sökväg till den nedladdade filen
+        response (requests.Response): Svaret som filen sparades från
+    """
+    meta = {}
+    if response.headers.get('ETag'):
+        meta['etag'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        meta['last_modified'] = response.headers['Last-Modified']
+
+    meta_filepath = filepath + ".meta.json"
+    if meta:
+        write_file_atomically(meta_filepath, orjson.dumps(meta, option=orjson.OPT_INDENT_2))
+    elif os.path.exists(meta_filepath):
+        os.remove(meta_filepath)
+
+
+def move_flat_document(output_dir: str, filepath: str) -> None:
+    """
+    Flyttar en fil sparad i den platta strukturen (utan årsmappar) till sin årsmapp.
+
+    Filer som laddats ner innan årsmappar infördes ligger direkt i output-katalogen. Genom att
+    flytta dem, tillsammans med eventuell metadatafil, kan de kontrolleras och uppdateras på
+    rätt plats i stället för att laddas ner på nytt som dubbletter.
+
+    Args:
+        output_dir (str): Baskatalog för nedladdade dokument
+        filepath (str): Sökväg till filen i dess årsmapp
+    """
+    flat_filepath = os.path.join(output_dir, os.path.basename(filepath))
+    if flat_filepath == filepath or os.path.exists(filepath) or not os.path.exists(flat_filepath):
+        return
+
+    ensure_dir(os.path.dirname(filepath))
+    os.replace(flat_filepath, filepath)
+    if os.path.exists(flat_filepath + ".meta.json"):
+        os.replace(flat_filepath + ".meta.json", filepath + ".meta.json")
+    print(f"↷ Flyttade {os.path.basename(filepath)} till {os.path.dirname(filepath)}")
+
+
+def iter_comma_separated(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Delar upp en ström av textblock i kommaseparerade värden utan att läsa in allt i minnet.
+
+    Args:
+        chunks (Iterable[str]): Textblock i den ordning de tas emot
+
+    Returns:
+        Iterator[str]: Trimmade, icke-tomma värden
+    """
+    remainder = ""
+    for chunk in chunks:
+        parts = (remainder + chunk).split(',')
+        # Sista delen kan vara ett ofullständigt värde som fortsätter i nästa block
+        remainder = parts.pop()
+        for part in parts:
+            value = part.strip()
+            if value:
+                yield value
+
+    value = remainder.strip()
+    if value:
+        yield value
 
 
 def fetch_document_ids(year: Optional[int] = None) -> List[str]:
@@ -26,18 +235,25 @@ def fetch_document_ids(year: Optional[int] = None) -> List[str]:
     
     print(f"Hämtar författnings-ID:n från: {url}")
     
+    # Tomt prefix matchar alla ID:n när inget årtal anges
+    prefix = f"sfs-{year}-" if year is not None else ""
+
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        # Parsa kommaseparerade värden och trimma mellanslag
-        content = response.text.strip()
-        document_ids = [doc_id.strip() for doc_id in content.split(',') if doc_id.strip()]
-        
-        # Filtrera baserat på årtal om specificerat
+        with SESSION.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+
+            # Parsa kommaseparerade värden medan svaret strömmas och behåll bara matchande ID:n
+            document_ids = []
+            original_count = 0
+            chunks = response.iter_content(chunk_size=65536, decode_unicode=True)
+            for doc_id in iter_comma_separated(chunks):
+                original_count += 1
+                if doc_id.startswith(prefix):
+                    document_ids.append(doc_id)
+
         if year is not None:
-            original_count = len(document_ids)
-            document_ids = [doc_id for doc_id in document_ids if doc_id.startswith(f"sfs-{year}-")]
             print(f"Filtrerade för år {year}: {len(document_ids)} av {original_count} författningar")
 
         print(f"Hittade {len(document_ids)} författnings-ID:n")
@@ -48,36 +264,61 @@ def fetch_document_ids(year: Optional[int] = None) -> List[str]:
         return []
 
 
-def download_document(document_id: str, output_dir: str = "documents") -> bool:
+def download_document(document_id: str, output_dir: str = "documents", year_as_folder: bool = True,
+                      update: bool = False) -> bool:
     """
     Laddar ner textinnehållet för en specifik författning.
+
+    Med update=True hämtas även redan nedladdade filer på nytt, men med villkorliga anrop
+    (If-None-Match/If-Modified-Since) så att servern kan svara 304 utan innehåll om
+    dokumentet inte har ändrats.
     
     Args:
         document_id (str): Författnings-ID att ladda ner
         output_dir (str): Katalog att spara filen i
+        year_as_folder (bool): Om True, spara filen i en årsmapp
+        update (bool): Om True, kontrollera om redan nedladdade filer har ändrats
         
     Returns:
         bool: True om nedladdningen lyckades, False annars
     """
     url = f"https://data.riksdagen.se/dokument/{document_id}.html"
     filename = f"{document_id}.html"
-    filepath = os.path.join(output_dir, filename)
+    filepath = os.path.join(get_document_dir(output_dir, document_id, year_as_folder), filename)
+
+    # Filer från den platta strukturen flyttas till årsmappen så att de inte laddas ner igen
+    try:
+        move_flat_document(output_dir, filepath)
+    except OSError as e:
+        print(f"✗ Fel vid flytt av {filename} till årsmapp: {e}")
+        return False
     
     # Kontrollera om filen redan finns
+    headers = {}
     if os.path.exists(filepath):
-        print(f"⚠ {filename} finns redan, hoppar över")
-        return True
+        if not update:
+            print(f"⚠ {filename} finns redan, hoppar över")
+            return True
+
+        meta = load_meta(filepath)
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
 
     try:
-        response = requests.get(url, timeout=30)
+        response = SESSION.get(url, headers=headers, timeout=30)
+
+        if response.status_code == 304:
+            print(f"= {filename} är oförändrad")
+            return True
+
         response.raise_for_status()
         
-        # Skapa katalog om den inte finns
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Spara textinnehållet till fil
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(response.text)
+        # Spara svaret som det är, utan att avkoda och koda om texten
+        ensure_dir(os.path.dirname(filepath))
+        write_file_atomically(filepath, response.content)
+        save_meta(filepath, response)
         
         print(f"✓ Sparade {filename}")
         return True
@@ -90,21 +331,21 @@ def download_document(document_id: str, output_dir: str = "documents") -> bool:
         return False
 
 
-def fetch_document_by_rkrattsbaser(doc_id: str) -> Optional[Dict]:
+def _search_rkrattsbaser_batch(doc_ids: List[str]) -> Optional[List[Dict]]:
     """
-    Hämtar en SFS-författning via Regeringskansliets Elasticsearch API baserat på författnings-ID.
+    Gör en terms-sökning mot Regeringskansliets Elasticsearch API för flera beteckningar.
 
     Args:
-        doc_id (str): Författnings-ID i Regeringskansliets format som "2009:907"
+        doc_ids (List[str]): Författnings-ID:n i Regeringskansliets format som "2009:907"
 
     Returns:
-        Optional[Dict]: Författningsdata om den hittas, None annars
+        Optional[List[Dict]]: Träffarna från API:et, eller None om anropet misslyckades
     """
     url = "https://beta.rkrattsbaser.gov.se/elasticsearch/SearchEsByRawJson"
 
     headers = {
         'content-type': 'application/json',
-        'referer': f'https://beta.rkrattsbaser.gov.se/sfs/item?bet={doc_id.replace(":", "%3A")}&tab=forfattningstext'
+        'referer': 'https://beta.rkrattsbaser.gov.se/sfs'
     }
 
     payload = {
@@ -114,41 +355,80 @@ def fetch_document_by_rkrattsbaser(doc_id: str) -> Optional[Dict]:
             "query": {
                 "bool": {
                     "must": [
-                        {"term": {"beteckning.keyword": doc_id}},
+                        {"terms": {"beteckning.keyword": doc_ids}},
                         {"term": {"publicerad": True}}
                     ]
                 }
             },
-            "size": 1
+            "size": len(doc_ids)
         }
     }
 
-    print(f"Hämtar dokument {doc_id} via Regeringskansliets Elasticsearch API...")
-
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = SESSION.post(url, headers=headers, json=payload, timeout=60)
         response.raise_for_status()
 
-        data = response.json()
-
-        # Kontrollera om vi fick några träffar
-        if 'hits' in data and 'hits' in data['hits'] and len(data['hits']['hits']) > 0:
-            document = data['hits']['hits'][0]['_source']
-            print(f"✓ Hittade dokument: {doc_id}")
-            return document
-        else:
-            print(f"⚠ Inget dokument hittades för ID: {doc_id}")
-            return None
+        data = orjson.loads(response.content)
+        return data.get('hits', {}).get('hits', [])
 
     except requests.RequestException as e:
-        print(f"✗ Fel vid hämtning av dokument {doc_id} via Elasticsearch: {e}")
+        print(f"✗ Fel vid hämtning av {len(doc_ids)} dokument via Elasticsearch: {e}")
         return None
-    except (KeyError, json.JSONDecodeError) as e:
-        print(f"✗ Fel vid parsing av svar för dokument {doc_id}: {e}")
+    except (AttributeError, orjson.JSONDecodeError) as e:
+        print(f"✗ Fel vid parsing av svar för {len(doc_ids)} dokument: {e}")
         return None
 
 
-def save_document_from_rkrattsbaser(doc_id: str, document_data: Dict, output_dir: str = "rkrattsbaser") -> bool:
+def fetch_documents_by_rkrattsbaser_batch(doc_ids: List[str]) -> Optional[Dict[str, Dict]]:
+    """
+    Hämtar flera SFS-författningar med så få anrop som möjligt mot Regeringskansliets Elasticsearch API.
+
+    Om en beteckning ger flera träffar kan dubbletterna fylla hela resultatfönstret. Då söks de
+    beteckningar som fortfarande saknas om tills svaret inte längre är fullt.
+
+    Args:
+        doc_ids (List[str]): Författnings-ID:n i Regeringskansliets format som "2009:907"
+
+    Returns:
+        Optional[Dict[str, Dict]]: Författningsdata per beteckning för de dokument som hittades,
+            eller None om API-anropet misslyckades innan något dokument hämtats
+    """
+    print(f"Hämtar {len(doc_ids)} dokument via Regeringskansliets Elasticsearch API...")
+
+    documents = {}
+    remaining_ids = list(doc_ids)
+
+    while remaining_ids:
+        hits = _search_rkrattsbaser_batch(remaining_ids)
+        if hits is None:
+            return documents or None
+
+        found_before = len(documents)
+        for hit in hits:
+            document = (hit.get('_source') if isinstance(hit, dict) else None) or {}
+            beteckning = document.get('beteckning')
+            if not beteckning:
+                # Hoppa över felaktiga träffar utan att förlora resten av gruppen
+                hit_id = hit.get('_id', 'okänt ID') if isinstance(hit, dict) else 'okänt ID'
+                print(f"⚠ Hoppar över träff utan beteckning: {hit_id}")
+                continue
+            # Behåll bästa träffen om samma beteckning förekommer flera gånger
+            documents.setdefault(beteckning, document)
+
+        window_full = len(hits) >= len(remaining_ids)
+        remaining_ids = [doc_id for doc_id in remaining_ids if doc_id not in documents]
+
+        # Ett svar som inte fyller fönstret innehåller alla träffar, så resten finns inte
+        if not window_full or len(documents) == found_before:
+            break
+        if remaining_ids:
+            print(f"⚠ Svaret fylldes av dubbletter, söker om {len(remaining_ids)} dokument...")
+
+    return documents
+
+
+def save_document_from_rkrattsbaser(doc_id: str, document_data: Dict, output_dir: str = "rkrattsbaser",
+                                    year_as_folder: bool = True) -> bool:
     """
     Sparar dokumentdata från Regeringskansliets API till fil.
 
@@ -156,12 +436,13 @@ def save_document_from_rkrattsbaser(doc_id: str, document_data: Dict, output_dir
         doc_id (str): Dokument-ID
         document_data (Dict): Dokumentdata från API:et
         output_dir (str): Katalog att spara filen i
+        year_as_folder (bool): Om True, spara filen i en årsmapp
 
     Returns:
         bool: True om sparningen lyckades, False annars
     """
     filename = f"{doc_id}.json"
-    filepath = os.path.join(output_dir, filename)
+    filepath = os.path.join(get_document_dir(output_dir, doc_id, year_as_folder), filename)
 
     # Kontrollera om filen redan finns
     if os.path.exists(filepath):
@@ -169,12 +450,9 @@ def save_document_from_rkrattsbaser(doc_id: str, document_data: Dict, output_dir
         return True
 
     try:
-        # Skapa katalog om den inte finns
-        os.makedirs(output_dir, exist_ok=True)
-
         # Spara JSON-data till fil
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(document_data, f, ensure_ascii=False, indent=2)
+        ensure_dir(os.path.dirname(filepath))
+        write_file_atomically(filepath, orjson.dumps(document_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
         print(f"✓ Sparade {filename}")
         return True
@@ -207,6 +485,204 @@ def convert_riksdagen_id_to_rkrattsbaser_format(doc_id: str) -> str:
     return doc_id
 
 
+MAX_WORKERS = 8
+DEFAULT_RATE = 2.0
+RKRATTSBASER_BATCH_SIZE = 200
+
+
+class RateLimiter:
+    """
+    Trådsäker hastighetsbegränsare (leaky bucket) som fördelar anrop jämnt över tid oavsett
+    antal samtidiga nedladdningar.
+
+    Till skillnad från en fast paus efter varje anrop väntar den bara så länge som krävs för att
+    hålla den angivna takten. Ett långsamt anrop gör alltså att nästa kan skickas direkt.
+    """
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate (float): Max antal anrop per sekund
+        """
+        self.interval = 1.0 / rate
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """
+        Väntar tills nästa lediga tidslucka och reserverar den.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(self._next_slot, now) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def filter_missing_documents(document_ids: List[str], output_dir: str, extension: str,
+                             year_as_folder: bool = True) -> List[str]:
+    """
+    Tar bort författningar som redan finns nedladdade, innan några anrop görs mot servern.
+
+    Sparade filer skrivs atomärt och fungerar därför som cache över körningar.
+
+    Args:
+        document_ids (List[str]): Författnings-ID:n att ladda ner
+        output_dir (str): Baskatalog för nedladdade dokument
+        extension (str): Filändelse för källan, t.ex. "html" eller "json"
+        year_as_folder (bool): Om True, sök även i årsmappar
+
+    Returns:
+        List[str]: Författnings-ID:n som saknas lokalt, i ursprunglig ordning
+    """
+    existing = scan_existing_documents(output_dir, year_as_folder)
+    return [document_id for document_id in document_ids if f"{document_id}.{extension}" not in existing]
+
+
+def chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    """
+    Delar upp en sekvens i listor med högst `size` element.
+
+    Args:
+        items (Iterable[str]): Element att dela upp
+        size (int): Max antal element per lista
+
+    Returns:
+        Iterator[List[str]]: Listor med element i ursprunglig ordning
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def process_rkrattsbaser_batch(document_ids: List[str], output_dir: str, year_as_folder: bool) -> Tuple[int, int]:
+    """
+    Hämtar och sparar en grupp författningar från Regeringskansliet med ett enda API-anrop.
+
+    Args:
+        document_ids (List[str]): Författnings-ID:n att ladda ner
+        output_dir (str): Katalog att spara filerna i
+        year_as_folder (bool): Om True, spara filerna i årsmappar
+
+    Returns:
+        Tuple[int, int]: Antal lyckade respektive misslyckade nedladdningar
+    """
+    successful_downloads = 0
+    failed_downloads = 0
+
+    # Konvertera dokument-ID:n till rätt format för rkrattsbaser
+    rkrattsbaser_ids = {convert_riksdagen_id_to_rkrattsbaser_format(document_id): document_id
+                        for document_id in document_ids}
+
+    documents = fetch_documents_by_rkrattsbaser_batch(list(rkrattsbaser_ids))
+    if documents is None:
+        # Felet har redan rapporterats en gång för hela gruppen
+        return 0, len(rkrattsbaser_ids)
+
+    for converted_id, document_id in rkrattsbaser_ids.items():
+        document_data = documents.get(converted_id)
+        if document_data is None:
+            print(f"⚠ Inget dokument hittades för ID: {converted_id}")
+            failed_downloads += 1
+        elif save_document_from_rkrattsbaser(document_id, document_data, output_dir, year_as_folder):
+            successful_downloads += 1
+        else:
+            failed_downloads += 1
+
+    return successful_downloads, failed_downloads
+
+
+def process_riksdagen_batch(document_ids: List[str], output_dir: str, year_as_folder: bool,
+                            update: bool = False) -> Tuple[int, int]:
+    """
+    Laddar ner en grupp författningar från Riksdagen, ett dokument per anrop.
+
+    Args:
+        document_ids (List[str]): Författnings-ID:n att ladda ner
+        output_dir (str): Katalog att spara filerna i
+        year_as_folder (bool): Om True, spara filerna i årsmappar
+        update (bool): Om True, kontrollera om redan nedladdade filer har ändrats
+
+    Returns:
+        Tuple[int, int]: Antal lyckade respektive misslyckade nedladdningar
+    """
+    successful_downloads = 0
+    for document_id in document_ids:
+        if download_document(document_id, output_dir, year_as_folder, update):
+            successful_downloads += 1
+    return successful_downloads, len(document_ids) - successful_downloads
+
+
+def download_all_documents(document_ids: List[str], source: str, output_dir: str,
+                           workers: int = 4, rate: float = DEFAULT_RATE,
+                           year_as_folder: bool = True, update: bool = False) -> Tuple[int, int]:
+    """
+    Laddar ner flera författningar samtidigt i en trådpool med begränsat antal arbetstrådar.
+
+    Riksdagen hämtas ett dokument per anrop medan Regeringskansliet hämtas i grupper om
+    RKRATTSBASER_BATCH_SIZE dokument per anrop. En gemensam RateLimiter ser till att servern
+    inte får fler än `rate` anrop per sekund, oavsett hur många trådar som används.
+
+    Args:
+        document_ids (List[str]): Författnings-ID:n att ladda ner
+        source (str): Källa, "riksdagen" eller "rkrattsbaser"
+        output_dir (str): Katalog att spara filerna i
+        workers (int): Antal parallella nedladdningar
+        rate (float): Max antal anrop per sekund mot servern
+        year_as_folder (bool): Om True, spara filerna i årsmappar
+        update (bool): Om True, kontrollera om redan nedladdade filer från Riksdagen har ändrats
+
+    Returns:
+        Tuple[int, int]: Antal lyckade respektive misslyckade nedladdningar
+    """
+    limiter = RateLimiter(rate)
+    total = len(document_ids)
+
+    if source == 'riksdagen':
+        batches = chunked(document_ids, 1)
+        process_batch = functools.partial(process_riksdagen_batch, update=update)
+    else:
+        batches = chunked(document_ids, RKRATTSBASER_BATCH_SIZE)
+        process_batch = process_rkrattsbaser_batch
+
+    def fetch_batch(batch: List[str]) -> Tuple[int, int]:
+        limiter.wait()
+        return process_batch(batch, output_dir, year_as_folder)
+
+    successful_downloads = 0
+    failed_downloads = 0
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_batch, batch): batch for batch in batches}
+
+        try:
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    successful, failed = future.result()
+                except Exception as e:
+                    print(f"✗ Oväntat fel vid nedladdning av {', '.join(batch)}: {e}")
+                    successful, failed = 0, len(batch)
+
+                successful_downloads += successful
+                failed_downloads += failed
+                done += len(batch)
+                label = batch[0] if len(batch) == 1 else f"{len(batch)} dokument"
+                print(f"[{done}/{total}] Klar med {label}")
+        except KeyboardInterrupt:
+            # Avbryt köade nedladdningar direkt i stället för att arbeta igenom hela kön
+            print("\n✗ Avbruten, väntar bara på pågående nedladdningar...")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    return successful_downloads, failed_downloads
+
+
 def main():
     """
     Huvudfunktion som koordinerar hämtning av dokument-ID:n och nedladdning av dokument.
@@ -220,11 +696,28 @@ def main():
                         help='Välj källa för nedladdning: riksdagen (HTML) eller rkrattsbaser (JSON via Elasticsearch) (default: riksdagen)')
     parser.add_argument('--year', type=int,
                         help='Filtrera dokument för specifikt årtal (t.ex. 2025 för sfs-2025-xxx). Fungerar endast med --ids all och --source riksdagen')
+    parser.add_argument('--workers', type=int, default=4,
+                        help=f'Antal parallella nedladdningar, max {MAX_WORKERS} (default: 4)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'Max antal anrop per sekund mot servern, för alla parallella nedladdningar sammanlagt (default: {DEFAULT_RATE:g})')
+    parser.add_argument('--update', action='store_true',
+                        help='Kontrollera om redan nedladdade dokument har ändrats och hämta om dem vid behov. Fungerar endast med --source riksdagen')
+    parser.add_argument('--no-year-folder', dest='year_folder', action='store_false',
+                        help='Skapa inte årsmappar för nedladdade dokument')
+    parser.set_defaults(year_folder=True)
 
     args = parser.parse_args()
 
+    if args.rate <= 0:
+        parser.error("--rate måste vara större än 0")
+
+    # Begränsa antalet trådar för att inte bli spärrade av servern
+    workers = max(1, min(args.workers, MAX_WORKERS))
+
     print("=== SFS Dokument Nedladdare ===")
     print(f"Källa: {args.source}")
+    print(f"Parallella nedladdningar: {workers}")
+    print(f"Max anrop per sekund: {args.rate:g}")
     if args.year:
         print(f"Filtrerar för år: {args.year}")
     
@@ -232,8 +725,8 @@ def main():
     if args.ids == 'all':
         document_ids = fetch_document_ids(args.year)
     else:
-        # Parsa kommaseparerade dokument-ID:n
-        document_ids = [doc_id.strip() for doc_id in args.ids.split(',') if doc_id.strip()]
+        # Parsa kommaseparerade dokument-ID:n och ta bort dubbletter med bibehållen ordning
+        document_ids = list(dict.fromkeys(doc_id.strip() for doc_id in args.ids.split(',') if doc_id.strip()))
         print(f"Använder {len(document_ids)} dokument-ID:n från parameter")
 
         # Varning om --year används med specifika IDs
@@ -246,38 +739,33 @@ def main():
     
     # Skapa katalog för nedladdade dokument
     output_dir = args.out
+    os.makedirs(output_dir, exist_ok=True)
     print(f"\nLaddar ner dokument till katalogen: {output_dir}")
-    
-    # Ladda ner varje dokument
-    successful_downloads = 0
-    failed_downloads = 0
-    
-    for i, document_id in enumerate(document_ids, 1):
-        print(f"[{i}/{len(document_ids)}] Laddar ner {document_id}...")
-
-        success = False
-        if args.source == 'riksdagen':
-            success = download_document(document_id, output_dir)
-        elif args.source == 'rkrattsbaser':
-            # Konvertera dokument-ID till rätt format för rkrattsbaser
-            converted_id = convert_riksdagen_id_to_rkrattsbaser_format(document_id)
-            document_data = fetch_document_by_rkrattsbaser(converted_id)
-            if document_data:
-                success = save_document_from_rkrattsbaser(document_id, document_data, output_dir)
-
-        if success:
-            successful_downloads += 1
-        else:
-            failed_downloads += 1
-        
-        # Kort paus mellan nedladdningar för att vara snäll mot servern
-        time.sleep(0.5)
-    
+
+    # Hoppa över dokument som redan finns lokalt, utom när de ska kontrolleras mot servern
+    update = args.update and args.source == 'riksdagen'
+    if args.update and not update:
+        print("⚠ --update stöds endast med --source riksdagen och ignoreras.")
+
+    extension = 'html' if args.source == 'riksdagen' else 'json'
+    missing_ids = document_ids if update else filter_missing_documents(document_ids, output_dir, extension, args.year_folder)
+    skipped_downloads = len(document_ids) - len(missing_ids)
+    if skipped_downloads:
+        print(f"⚠ {skipped_downloads} av {len(document_ids)} dokument finns redan, hoppar över")
+
+    # Ladda ner dokumenten parallellt
+    successful_downloads, failed_downloads = 0, 0
+    if missing_ids:
+        successful_downloads, failed_downloads = download_all_documents(
+            missing_ids, args.source, output_dir, workers, args.rate, args.year_folder, update
+        )
+
     # Sammanfattning
     print("\n=== Sammanfattning ===")
     print(f"Totalt dokument-ID:n: {len(document_ids)}")
     print(f"Lyckade nedladdningar: {successful_downloads}")
     print(f"Misslyckade nedladdningar: {failed_downloads}")
+    print(f"Skippade dokument (finns redan): {skipped_downloads}")
     
     if successful_downloads > 0:
         print(f"Dokument sparade i katalogen: {os.path.abspath(output_dir)}")